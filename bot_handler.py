@@ -3,11 +3,13 @@ from telegram.ext import CallbackContext
 from telegram_bot_calendar import DetailedTelegramCalendar, LSTEP
 import re
 from database_manager import DatabaseManager
+from storage_backend import StorageBackend
 from task_manager import TaskManager
+from response_composer import composed_handler
 
 class BotHandler:
-    def __init__(self):
-        self.db_manager = DatabaseManager()
+    def __init__(self, db_manager: StorageBackend = None):
+        self.db_manager = db_manager or DatabaseManager()
 
     @staticmethod
     def recurrence_name(recurrence: str) -> str:
@@ -26,144 +28,175 @@ class BotHandler:
         return bool(re.fullmatch(r"([01]?\d|2[0-3]):([0-5]\d)", text))
 
 
+    @composed_handler(fallback_text="⚠️ Произошла ошибка при обработке ввода. Попробуйте еще раз.")
     async def handle_text_input(self, update: Update, context: CallbackContext) -> None:
         """Обрабатывает текстовый ввод (название задачи, время, произвольную периодичность)"""
-        try:
-            text = update.message.text.strip()
-
-            if not any([
-                context.user_data.get('waiting_for_time'),
-                context.user_data.get('editing_task'),
-                context.user_data.get('adding_task')
-            ]):
-                await update.message.reply_text("❌ Я вас не понял. Используйте кнопки меню.")
-                return
+        text = update.message.text.strip()
+
+        if not any([
+            context.user_data.get('waiting_for_time'),
+            context.user_data.get('editing_task'),
+            context.user_data.get('adding_task')
+        ]):
+            context.response.reply("❌ Я вас не понял. Используйте кнопки меню.")
+            return
 
-            if context.user_data.get('waiting_for_time'):
-                if self.is_valid_time_format(text):
-                    context.user_data["task_time"] = text
-                    context.user_data["waiting_for_time"] = False
-
-                    keyboard = [
-                        [InlineKeyboardButton("Разовая", callback_data="once")],
-                        [InlineKeyboardButton("Каждый день", callback_data="daily")],
-                        [InlineKeyboardButton("Раз в неделю", callback_data="weekly")],
-                        [InlineKeyboardButton("Раз в месяц", callback_data="monthly")],
-                        [InlineKeyboardButton("Раз в год", callback_data="yearly")],
-                    ]
-                    reply_markup = InlineKeyboardMarkup(keyboard)
-                    await update.message.reply_text("Выберите периодичность задачи:", reply_markup=reply_markup)
-                else:
-                    await update.message.reply_text("❌ Некорректный формат. Введите время в формате ЧЧ:ММ (например, 09:45):")
-                return
+        if context.user_data.get('waiting_for_time'):
+            if self.is_valid_time_format(text):
+                context.user_data["task_time"] = text
+                context.user_data["waiting_for_time"] = False
+
+                keyboard = [
+                    [InlineKeyboardButton("Разовая", callback_data="once")],
+                    [InlineKeyboardButton("Каждый день", callback_data="daily")],
+                    [InlineKeyboardButton("Раз в неделю", callback_data="weekly")],
+                    [InlineKeyboardButton("Раз в месяц", callback_data="monthly")],
+                    [InlineKeyboardButton("Раз в год", callback_data="yearly")],
+                ]
+                reply_markup = InlineKeyboardMarkup(keyboard)
+                context.response.reply("Выберите периодичность задачи:", reply_markup=reply_markup)
+            else:
+                context.response.reply("❌ Некорректный формат. Введите время в формате ЧЧ:ММ (например, 09:45):")
+            return
 
-            if context.user_data.get("editing_task"):
-                task = context.user_data.get("selected_task")
-                edit_type = context.user_data.get("edit_type")
+        if context.user_data.get("editing_task"):
+            task = context.user_data.get("selected_task")
+            edit_type = context.user_data.get("edit_type")
 
-                if not task:
-                    await update.message.reply_text("❌ Ошибка: Задача не выбрана.")
-                    await self.main_menu(update, context)
-                    return
+            if not task:
+                context.response.reply("❌ Ошибка: Задача не выбрана.")
+                await self.main_menu(update, context)
+                return
 
-                if edit_type == "name":
-                    task.name = text
-                elif edit_type == "time":
-                    if self.is_valid_time_format(text):
-                        task.time = text
-                    else:
-                        await update.message.reply_text("❌ Некорректный формат времени. Введите ЧЧ:ММ (например, 09:45).")
-                        return
+            if edit_type == "name":
+                task.name = text
+                self.db_manager.update_task(task)
+            elif edit_type == "time":
+                if self.is_valid_time_format(text):
+                    TaskManager(task.user_id, self.db_manager).reschedule_task(task, new_time=text)
                 else:
-                    await update.message.reply_text("❌ Некорректный ввод.")
+                    context.response.reply("❌ Некорректный формат времени. Введите ЧЧ:ММ (например, 09:45).")
                     return
-                
-                self.db_manager.update_task(task)
-                context.user_data["selected_task"] = task
-                edit_labels = {"name": "Имя", "time": "Время"}
-                edit_label = edit_labels.get(edit_type, edit_type.capitalize())
-                await update.message.reply_text(f"✅ {edit_label} изменено.")
-
-                context.user_data.pop("editing_task", None)
-                context.user_data.pop("edit_type", None)
-                await self.main_menu(update, context)
+            else:
+                context.response.reply("❌ Некорректный ввод.")
                 return
 
-            if context.user_data.get('adding_task'):
-                context.user_data['task_name'] = text
-                context.user_data['adding_task'] = False
-                await update.message.reply_text(f"Название задачи '{text}' сохранено. Теперь выберите дату выполнения.")
-                await self.ask_for_date(update, context)
+            context.user_data["selected_task"] = task
+            edit_labels = {"name": "Имя", "time": "Время"}
+            edit_label = edit_labels.get(edit_type, edit_type.capitalize())
+            context.response.reply(f"✅ {edit_label} изменено.")
 
-        except Exception as e:
-            await update.message.reply_text("⚠️ Произошла ошибка при обработке ввода. Попробуйте еще раз.")
-            print(f"Ошибка в handle_text_input: {e}")
+            context.user_data.pop("editing_task", None)
+            context.user_data.pop("edit_type", None)
+            await self.main_menu(update, context)
+            return
 
+        if context.user_data.get('adding_task'):
+            context.user_data['task_name'] = text
+            context.user_data['adding_task'] = False
+            context.response.reply(f"Название задачи '{text}' сохранено. Теперь выберите дату выполнения.")
+            await self.ask_for_date(update, context)
+
+    @composed_handler
     async def main_menu(self, update: Update, context: CallbackContext) -> None:
         """Главное меню бота"""
         keyboard = [
             [InlineKeyboardButton("📅 Просмотр задач на сегодня", callback_data="list_today")],
             [InlineKeyboardButton("📋 Просмотр всех задач", callback_data="list")],
             [InlineKeyboardButton("➕ Добавить задачу", callback_data="add")],
+            [InlineKeyboardButton("📊 Статистика", callback_data="stats")],
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
 
         if update.callback_query:
-            await update.callback_query.message.edit_text("Выберите действие: ⚙️", reply_markup=reply_markup)
-            await update.callback_query.answer()
+            context.response.edit("Выберите действие: ⚙️", reply_markup=reply_markup)
+            context.response.answer()
         else:
-            await update.message.reply_text("Выберите действие: ⚙️", reply_markup=reply_markup)
+            context.response.reply("Выберите действие: ⚙️", reply_markup=reply_markup)
 
+    @composed_handler
     async def button_handler(self, update: Update, context: CallbackContext) -> None:
         """Обработчик нажатий на кнопки"""
         query = update.callback_query
         user_id = query.message.chat_id
         task_manager = TaskManager(user_id, self.db_manager)
         
-        await query.answer()
+        context.response.answer()
 
         if query.data == 'list_today':
             tasks = task_manager.get_today_tasks()
-            await self.show_tasks(update, tasks)
+            await self.show_tasks(update, context, tasks)
 
         elif query.data == 'list':
             tasks = task_manager.get_all_tasks()
-            await self.show_tasks(update, tasks)
+            await self.show_tasks(update, context, tasks)
 
         elif query.data == 'add':
-            await query.message.edit_text(text="Введите название новой задачи:")
+            context.response.edit(text="Введите название новой задачи:")
             context.user_data['adding_task'] = True
 
+        elif query.data == 'stats':
+            await self.show_stats(update, context)
+
         elif query.data == 'main_menu':
             await self.main_menu(update, context)
 
-    async def show_tasks(self, update: Update, tasks):
+    @composed_handler
+    async def show_stats(self, update: Update, context: CallbackContext) -> None:
+        """Показывает статистику выполнения задач по типам периодичности"""
+        user_id = update.effective_chat.id
+        task_manager = TaskManager(user_id, self.db_manager)
+        stats = task_manager.get_stats()
+
+        if stats:
+            lines = ["📊 Статистика выполнения:"]
+            for recurrence, on_time, late, missed, streak, best_streak in stats:
+                lines.append(
+                    f"\n🔁 {self.recurrence_name(recurrence)}\n"
+                    f"✅ Вовремя: {on_time}\n⌛ С опозданием: {late}\n❌ Пропущено: {missed}\n"
+                    f"🔥 Серия: {streak} (лучшая: {best_streak})"
+                )
+            text = "\n".join(lines)
+        else:
+            text = "📊 Пока нет выполненных задач."
+
+        keyboard = [[InlineKeyboardButton("🔙 Вернуться в меню", callback_data="main_menu")]]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        if update.callback_query:
+            context.response.edit(text, reply_markup=reply_markup)
+        else:
+            context.response.reply(text, reply_markup=reply_markup)
+
+    @composed_handler
+    async def show_tasks(self, update: Update, context: CallbackContext, tasks):
         """Выводит список задач в виде inline-кнопок"""
         if not tasks:
-            await update.callback_query.message.reply_text("📭 Нет активных задач.")
-            await self.main_menu(update, None)
+            context.response.reply("📭 Нет активных задач.")
+            await self.main_menu(update, context)
             return
 
         keyboard = [[InlineKeyboardButton(f"{task.name} ({task.date} {task.time})", callback_data=f"task_{task.task_id}")] for task in tasks]
         keyboard.append([InlineKeyboardButton("🔙 Вернуться в меню", callback_data="main_menu")])
         reply_markup = InlineKeyboardMarkup(keyboard)
-        await update.callback_query.message.edit_text("📋 Ваши задачи:", reply_markup=reply_markup)
+        context.response.edit("📋 Ваши задачи:", reply_markup=reply_markup)
 
+    @composed_handler
     async def ask_for_date(self, update: Update, context: CallbackContext) -> None:
         """Запускает календарь для выбора даты"""
         query = update.callback_query 
         message = query.message if query else update.message
 
         if query:
-            await query.answer()
-            await query.message.delete()
+            context.response.answer()
+            context.response.delete()
 
         if message is None:
             return
 
         calendar, step = DetailedTelegramCalendar(calendar_id="calendar").build()
-        await message.reply_text(f"Выберите {LSTEP[step]}", reply_markup=calendar)
+        context.response.reply(f"Выберите {LSTEP[step]}", reply_markup=calendar)
 
+    @composed_handler
     async def handle_recurrence_change(self, update: Update, context: CallbackContext) -> None:
         """Обрабатывает изменение периодичности задачи"""
         query = update.callback_query
@@ -182,39 +215,40 @@ class BotHandler:
             task.recurrence = new_recurrence
             self.db_manager.update_task(task)
             context.user_data["selected_task"] = task
-            await query.message.reply_text(f"✅ Периодичность изменена на '{self.recurrence_name(new_recurrence)}'.")
+            context.response.reply(f"✅ Периодичность изменена на '{self.recurrence_name(new_recurrence)}'.")
         else:
-            await query.message.reply_text("❌ Ошибка: Задача не найдена.")
+            context.response.reply("❌ Ошибка: Задача не найдена.")
         await self.main_menu(update, context)
 
 
+    @composed_handler
     async def calendar_handler(self, update: Update, context: CallbackContext) -> None:
         """Обрабатывает выбор даты из календаря"""
         query = update.callback_query
         result, key, step = DetailedTelegramCalendar(calendar_id="calendar").process(query.data)
 
         if not result and key:
-            await query.message.edit_text(f"Выберите {LSTEP[step]}", reply_markup=key)
+            context.response.edit(f"Выберите {LSTEP[step]}", reply_markup=key)
             return
 
         if result:
             if context.user_data.get("editing_date"):
                 task = context.user_data.get("selected_task")
                 if task:
-                    task.date = result
-                    self.db_manager.update_task(task)
+                    TaskManager(task.user_id, self.db_manager).reschedule_task(task, new_date=result)
                     context.user_data["selected_task"] = task
                     context.user_data.pop("editing_date")
-                    await query.message.reply_text(f"📅 Дата задачи изменена на {result}.")
+                    context.response.reply(f"📅 Дата задачи изменена на {result}.")
                 else:
-                    await query.message.reply_text("❌ Ошибка: Задача не выбрана.")
+                    context.response.reply("❌ Ошибка: Задача не выбрана.")
                 await self.main_menu(update, context)
             else:
                 context.user_data["task_date"] = result
                 context.user_data["waiting_for_time"] = True
-                await query.message.edit_text(f"📅 Дата задачи установлена: {result}\n⌨ Теперь введите время в формате ЧЧ:ММ (например, 17:37):")
-        await query.answer()
+                context.response.edit(f"📅 Дата задачи установлена: {result}\n⌨ Теперь введите время в формате ЧЧ:ММ (например, 17:37):")
+        context.response.answer()
 
+    @composed_handler
     async def period_choice_handler(self, update: Update, context: CallbackContext) -> None:
         """Обрабатывает выбор периодичности задачи"""
         query = update.callback_query
@@ -222,6 +256,7 @@ class BotHandler:
         context.user_data["task_recurrence"] = recurrence
         await self.save_task(update, context)
 
+    @composed_handler
     async def save_task(self, update: Update, context: CallbackContext) -> None:
         """Сохраняет задачу в базу данных"""
         user_id = update.effective_chat.id
@@ -234,22 +269,20 @@ class BotHandler:
         if not all([task_name, task_date, task_time, task_recurrence]):
             error_message = "❌ Ошибка: не все данные заполнены."
             if update.callback_query:
-                await update.callback_query.message.edit_text(error_message)
+                context.response.edit(error_message)
             else:
-                await update.message.reply_text(error_message)
+                context.response.reply(error_message)
             return
 
         await self.db_manager.add_task(user_id, task_name, task_date, task_time, task_recurrence)
         confirmation_text = "✅ Задача успешно сохранена!"
 
-        if update.callback_query:
-            await update.callback_query.message.reply_text(confirmation_text)
-        else:
-            await update.message.reply_text(confirmation_text)
+        context.response.reply(confirmation_text)
 
         user_data.clear()
         await self.main_menu(update, context)
 
+    @composed_handler
     async def handle_task_selection(self, update: Update, context: CallbackContext) -> None:
         """Обрабатывает выбор задачи и открывает меню task_edit"""
         query = update.callback_query
@@ -258,7 +291,7 @@ class BotHandler:
         task_manager = TaskManager(user_id, self.db_manager)
         task = task_manager.get_task_by_id(task_id)
         if not task:
-            await query.message.reply_text("❌ Задача не найдена.")
+            context.response.reply("❌ Задача не найдена.")
             await self.main_menu(update, context)
             return
 
@@ -269,19 +302,20 @@ class BotHandler:
             [InlineKeyboardButton("🔙 Вернуться в меню", callback_data="back_to_menu")],
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
-        await query.message.edit_text(
+        context.response.edit(
             f"📌 Задача: *{task.name}*\n📅 Дата: {task.date}\n⏰ Время: {task.time}\n🔁 Периодичность: {self.recurrence_name(task.recurrence)}",
             parse_mode="Markdown",
             reply_markup=reply_markup
         )
 
+    @composed_handler
     async def task_edit_handler(self, update: Update, context: CallbackContext) -> None:
         """Обрабатывает действия в меню task_edit"""
         query = update.callback_query
         task = context.user_data.get("selected_task")
 
         if not task:
-            await query.message.reply_text("❌ Ошибка: Задача не выбрана.")
+            context.response.reply("❌ Ошибка: Задача не выбрана.")
             await self.main_menu(update, context)
             return
 
@@ -290,7 +324,7 @@ class BotHandler:
                 [InlineKeyboardButton("✅ Да", callback_data="confirm_complete")],
                 [InlineKeyboardButton("❌ Нет", callback_data="cancel")],
             ]
-            await query.message.edit_text("Вы уверены, что хотите завершить задачу?", reply_markup=InlineKeyboardMarkup(keyboard))
+            context.response.edit("Вы уверены, что хотите завершить задачу?", reply_markup=InlineKeyboardMarkup(keyboard))
 
         elif query.data == "edit_task":
             keyboard = [
@@ -300,15 +334,16 @@ class BotHandler:
                 [InlineKeyboardButton("🔁 Изменить периодичность", callback_data="edit_recurrence")],
                 [InlineKeyboardButton("🔙 Вернуться в меню", callback_data="back_to_menu")],
             ]
-            await query.message.edit_text("Что вы хотите изменить?", reply_markup=InlineKeyboardMarkup(keyboard))
+            context.response.edit("Что вы хотите изменить?", reply_markup=InlineKeyboardMarkup(keyboard))
 
         elif query.data == "edit_date":
             context.user_data["editing_date"] = True
             await self.ask_for_date(update, context)
         elif query.data == "back_to_menu":
             await self.main_menu(update, context)
-        await query.answer()
+        context.response.answer()
 
+    @composed_handler
     async def confirm_task_completion(self, update: Update, context: CallbackContext) -> None:
         """Подтверждение завершения задачи"""
         query = update.callback_query
@@ -318,40 +353,41 @@ class BotHandler:
 
         if task:
             if query.data == "confirm_complete":
-                task_manager.delete_task(task.task_id)
-                await query.message.edit_text(f"✅ Задача '{task.name}' завершена.")
+                task_manager.complete_task(task)
+                context.response.edit(f"✅ Задача '{task.name}' завершена.")
                 await self.main_menu(update, context)
             elif query.data == "cancel":
                 await self.main_menu(update, context)
         else:
-            await query.message.edit_text("❌ Ошибка: Задача не найдена.")
-        await query.answer()
+            context.response.edit("❌ Ошибка: Задача не найдена.")
+        context.response.answer()
 
+    @composed_handler
     async def edit_task(self, update: Update, context: CallbackContext) -> None:
         """Обрабатывает выбор параметра для редактирования"""
         query = update.callback_query
         task = context.user_data.get("selected_task")
 
         if not task:
-            await query.message.edit_text("❌ Ошибка: Задача не выбрана.")
+            context.response.edit("❌ Ошибка: Задача не выбрана.")
             return
         if query.data == "edit_name":
-            await query.message.edit_text("Введите новое название:")
+            context.response.edit("Введите новое название:")
             context.user_data["editing_task"] = True
             context.user_data["edit_type"] = "name"
         elif query.data == "edit_date":
             context.user_data["editing_date"] = True
             await self.ask_for_date(update, context)
         elif query.data == "edit_time":
-            await query.message.edit_text("Введите новое время в формате ЧЧ:ММ:")
+            context.response.edit("Введите новое время в формате ЧЧ:ММ:")
             context.user_data["editing_task"] = True
             context.user_data["edit_type"] = "time"
         elif query.data == "edit_recurrence":
             await self.ask_for_recurrence(update, context)
 
+    @composed_handler
     async def ask_for_recurrence(self, update: Update, context: CallbackContext) -> None:
         """Отправляет inline-кнопки для выбора новой периодичности"""
-        query = update.callback_query
         keyboard = [
             [InlineKeyboardButton("Разовая", callback_data="recurrence_once")],
             [InlineKeyboardButton("Каждый день", callback_data="recurrence_daily")],
@@ -360,4 +396,4 @@ class BotHandler:
             [InlineKeyboardButton("Раз в год", callback_data="recurrence_yearly")],
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
-        await query.message.edit_text("Выберите новую периодичность:", reply_markup=reply_markup)
\ No newline at end of file
+        context.response.edit("Выберите новую периодичность:", reply_markup=reply_markup)
\ No newline at end of file
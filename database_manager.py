@@ -2,14 +2,19 @@ import sqlite3
 import aiosqlite
 import datetime
 from task import Task
+from storage_backend import StorageBackend
 
-class DatabaseManager:
-    def __init__(self, db_path="tasks.db"):
+
+class DatabaseManager(StorageBackend):
+    def __init__(self, db_path="tasks.db", history_batch_size=20):
+        super().__init__(history_batch_size)
         self.db_path = db_path
         self.initialize_database()
 
     def initialize_database(self):
         """Создает таблицу tasks, если она не существует"""
+        self.execute_query("PRAGMA auto_vacuum = INCREMENTAL")
+        self.execute_query("PRAGMA journal_mode = WAL")
         query = """
         CREATE TABLE IF NOT EXISTS tasks (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -21,6 +26,31 @@ class DatabaseManager:
         )
         """
         self.execute_query(query)
+        self.execute_query("""
+        CREATE TABLE IF NOT EXISTS task_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            task_id INTEGER,
+            name TEXT NOT NULL,
+            recurrence TEXT NOT NULL,
+            due_at TEXT NOT NULL,
+            event_at TEXT NOT NULL,
+            outcome TEXT NOT NULL
+        )
+        """)
+        self.execute_query("""
+        CREATE TABLE IF NOT EXISTS user_stats (
+            user_id INTEGER NOT NULL,
+            recurrence TEXT NOT NULL,
+            done_on_time INTEGER NOT NULL DEFAULT 0,
+            done_late INTEGER NOT NULL DEFAULT 0,
+            missed INTEGER NOT NULL DEFAULT 0,
+            current_streak INTEGER NOT NULL DEFAULT 0,
+            best_streak INTEGER NOT NULL DEFAULT 0,
+            last_event_id INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, recurrence)
+        )
+        """)
 
     def execute_query(self, query, params=(), fetchone=False, fetchall=False):
         """Выполняет запрос к БД"""
@@ -111,14 +141,16 @@ class DatabaseManager:
                 return tasks
             
     async def get_all_tasks_with_prefix(self, prefix="❌"):
-        """Получает все задачи, у которых в начале имени есть указанный префикс (по умолчанию '❌')."""
+        """Получает все задачи, у которых в начале имени есть указанный префикс (по умолчанию '❌').
+        Префикс сравнивается буквально, с учётом регистра.
+        """
         query = """
         SELECT id, user_id, name, date, time, recurrence 
         FROM tasks 
-        WHERE name LIKE ?
+        WHERE substr(name, 1, length(?)) = ?
         """
         async with aiosqlite.connect(self.db_path) as db:
-            async with db.execute(query, (f"{prefix}%",)) as cursor:
+            async with db.execute(query, (prefix, prefix)) as cursor:
                 rows = await cursor.fetchall()
                 return [Task(*row) for row in rows]
 
@@ -130,3 +162,88 @@ class DatabaseManager:
             async with db.execute(query) as cursor:
                 rows = await cursor.fetchall()
                 return [row[0] for row in rows]
+
+
+    def flush_task_history(self):
+        """Записывает накопленные события в task_history и обновляет user_stats в одной транзакции.
+        Если запись не удалась, события возвращаются в буфер.
+        """
+        if not self._history_buffer:
+            return
+        events, self._history_buffer = self._history_buffer, []
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                self._write_history(conn.cursor(), events)
+        except sqlite3.Error:
+            self._history_buffer = events + self._history_buffer
+            raise
+
+    def complete_task(self, task, outcome, event_at=None):
+        """Удаляет задачу и записывает событие о её выполнении (вместе с буфером) в одной транзакции"""
+        events = self._history_buffer + [self._history_event(task, outcome, event_at)]
+        self._history_buffer = []
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                self._write_history(cursor, events)
+                cursor.execute("DELETE FROM tasks WHERE id = ?", (task.task_id,))
+        except sqlite3.Error:
+            self._history_buffer = events[:-1] + self._history_buffer
+            raise
+
+    def _write_history(self, cursor, events):
+        stats = {}
+        for user_id, _, _, recurrence, _, _, outcome in events:
+            key = (user_id, recurrence)
+            if key not in stats:
+                row = cursor.execute(
+                    "SELECT done_on_time, done_late, missed, current_streak, best_streak, last_event_id "
+                    "FROM user_stats WHERE user_id = ? AND recurrence = ?",
+                    key,
+                ).fetchone()
+                stats[key] = list(row) if row else [0, 0, 0, 0, 0, 0]
+        for event in events:
+            cursor.execute(
+                "INSERT INTO task_history (user_id, task_id, name, recurrence, due_at, event_at, outcome) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                event,
+            )
+            self._apply_event(stats[(event[0], event[3])], event[6], cursor.lastrowid)
+        self._save_stats(cursor, stats)
+
+    @staticmethod
+    def _save_stats(cursor, stats):
+        cursor.executemany(
+            "INSERT OR REPLACE INTO user_stats "
+            "(user_id, recurrence, done_on_time, done_late, missed, current_streak, best_streak, last_event_id) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(*key, *row) for key, row in stats.items()],
+        )
+
+    def get_user_stats(self, user_id):
+        """Получает готовые счётчики пользователя по каждому типу периодичности"""
+        self.flush_task_history()
+        query = """
+        SELECT recurrence, done_on_time, done_late, missed, current_streak, best_streak
+        FROM user_stats
+        WHERE user_id = ?
+        """
+        return self.execute_query(query, (user_id,), fetchall=True)
+
+    def rebuild_user_stats(self):
+        """Пересчитывает user_stats заново по журналу task_history.
+        Возвращает True, если результат совпал с инкрементально накопленными счётчиками.
+        """
+        self.flush_task_history()
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            previous = cursor.execute("SELECT * FROM user_stats ORDER BY user_id, recurrence").fetchall()
+            stats = {}
+            rows = cursor.execute("SELECT id, user_id, recurrence, outcome FROM task_history ORDER BY id")
+            for event_id, user_id, recurrence, outcome in rows.fetchall():
+                row = stats.setdefault((user_id, recurrence), [0, 0, 0, 0, 0, 0])
+                self._apply_event(row, outcome, event_id)
+            cursor.execute("DELETE FROM user_stats")
+            self._save_stats(cursor, stats)
+            rebuilt = cursor.execute("SELECT * FROM user_stats ORDER BY user_id, recurrence").fetchall()
+        return previous == rebuilt
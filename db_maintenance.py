@@ -0,0 +1,161 @@
+import asyncio
+import datetime
+from contextlib import closing
+import logging
+import os
+import sqlite3
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseMaintenance:
+    def __init__(self, db_path="tasks.db", backup_dir="backups", keep_backups=3, vacuum_pages=100, backup_pages=64):
+        """
+        Фоновое обслуживание SQLite-базы небольшими порциями.
+        :param db_path: Путь к базе данных
+        :param backup_dir: Каталог для онлайн-копий
+        :param keep_backups: Сколько последних копий хранить
+        :param vacuum_pages: Сколько свободных страниц освобождать за один шаг incremental_vacuum
+        :param backup_pages: Сколько страниц копировать за один шаг backup API
+        """
+        self.db_path = db_path
+        self.backup_dir = backup_dir
+        self.keep_backups = keep_backups
+        self.vacuum_pages = vacuum_pages
+        self.backup_pages = backup_pages
+        self.intervals = {
+            "checkpoint": datetime.timedelta(minutes=10),
+            "incremental_vacuum": datetime.timedelta(minutes=10),
+            "optimize": datetime.timedelta(hours=1),
+            "analyze": datetime.timedelta(days=1),
+            "backup": datetime.timedelta(days=1),
+        }
+        self.last_run = {}
+        self.last_report = {}
+
+    def connect(self):
+        return closing(sqlite3.connect(self.db_path, timeout=1))
+
+    def page_stats(self):
+        """Возвращает число страниц, свободных страниц и долю фрагментации"""
+        with self.connect() as conn:
+            page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+            freelist_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        return {
+            "page_count": page_count,
+            "freelist_count": freelist_count,
+            "page_size": page_size,
+            "fragmentation": freelist_count / page_count if page_count else 0.0,
+        }
+
+    def incremental_vacuum_enabled(self):
+        with self.connect() as conn:
+            return conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+    def enable_incremental_vacuum(self):
+        """Переводит базу в режим auto_vacuum=INCREMENTAL через полный VACUUM.
+        Блокирует базу на всё время перезаписи, поэтому запускается только при остановленном боте:
+        python db_maintenance.py
+        """
+        if self.incremental_vacuum_enabled():
+            return False
+        with self.connect() as conn:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+        logger.info("Включён режим auto_vacuum=INCREMENTAL")
+        return True
+
+    def checkpoint(self):
+        """WAL checkpoint в режиме PASSIVE: не ждёт читателей и писателей"""
+        with self.connect() as conn:
+            busy, log_pages, checkpointed = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+        return {"wal_pages": log_pages, "checkpointed_pages": checkpointed}
+
+    def incremental_vacuum(self, deadline):
+        """Освобождает свободные страницы порциями по vacuum_pages, пока не истечёт deadline.
+        Для базы без auto_vacuum=INCREMENTAL ничего не делает (см. enable_incremental_vacuum).
+        """
+        if not self.incremental_vacuum_enabled():
+            if not self.last_run.get("incremental_vacuum"):
+                logger.info("auto_vacuum не INCREMENTAL, incremental_vacuum пропускается")
+            return {"freed_pages": 0}
+        freed = 0
+        with self.connect() as conn:
+            while time.monotonic() < deadline:
+                free_before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if not free_before:
+                    break
+                conn.execute(f"PRAGMA incremental_vacuum({self.vacuum_pages})").fetchall()
+                step = free_before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if not step:
+                    break
+                freed += step
+        return {"freed_pages": freed}
+
+    def optimize(self):
+        with self.connect() as conn:
+            conn.execute("PRAGMA optimize")
+        return {}
+
+    def analyze(self):
+        with self.connect() as conn:
+            conn.execute("ANALYZE")
+        return {}
+
+    def backup(self):
+        """Онлайн-копия через SQLite backup API шагами по backup_pages страниц.
+        Между шагами блокировка отпускается; копия выполняется целиком, поэтому
+        обслуживание запускается отдельной задачей и не задерживает проверку задач.
+        """
+        os.makedirs(self.backup_dir, exist_ok=True)
+        name = f"tasks-{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}.db"
+        target_path = os.path.join(self.backup_dir, name)
+        started = time.monotonic()
+        with self.connect() as source, closing(sqlite3.connect(target_path)) as target:
+            source.backup(target, pages=self.backup_pages, sleep=0.05)
+        duration = time.monotonic() - started
+
+        backups = sorted(f for f in os.listdir(self.backup_dir) if f.startswith("tasks-") and f.endswith(".db"))
+        for old in backups[:-self.keep_backups]:
+            os.remove(os.path.join(self.backup_dir, old))
+        return {"backup_path": target_path, "backup_duration": round(duration, 3)}
+
+    def run_slice(self, budget=0.5):
+        """Выполняет просроченные работы обслуживания, пока не истечёт бюджет времени (в секундах)"""
+        deadline = time.monotonic() + budget
+        now = datetime.datetime.now()
+        report = {}
+        jobs = []
+        for job, interval in self.intervals.items():
+            if time.monotonic() >= deadline:
+                break
+            last_run = self.last_run.get(job)
+            if last_run and now - last_run < interval:
+                continue
+            try:
+                if job == "incremental_vacuum":
+                    report.update(self.incremental_vacuum(deadline))
+                else:
+                    report.update(getattr(self, job)())
+                self.last_run[job] = now
+                jobs.append(job)
+            except sqlite3.OperationalError as e:
+                logger.warning(f"Обслуживание БД ({job}) пропущено: {e}")
+
+        if jobs:
+            report["jobs"] = jobs
+            report.update(self.page_stats())
+            self.last_report = report
+            logger.info(f"Обслуживание БД: {report}")
+        return report
+
+    async def run(self, budget=0.5):
+        """Асинхронно выполняет run_slice в отдельном потоке, не блокируя обработчики"""
+        return await asyncio.to_thread(self.run_slice, budget)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    DatabaseMaintenance().enable_incremental_vacuum()
@@ -5,6 +5,7 @@ import os
 from dotenv import load_dotenv
 import asyncio
 from scheduler import Scheduler
+from db_maintenance import DatabaseMaintenance
 
 # Включаем логирование
 logging.basicConfig(
@@ -15,10 +16,16 @@ logging.getLogger("httpx").setLevel(logging.WARNING)
 load_dotenv()
 
 TOKEN = os.getenv("TELEGRAM_BOT_TOKEN") # Подгрузка переменной окружения
-application = Application.builder().token(TOKEN).build()
 bot_handler = BotHandler() # Обработчик
 
-scheduler = Scheduler(application.bot, bot_handler.db_manager) # Планировщик
+async def flush_history(application):
+    """Сохраняет накопленные события истории при остановке бота"""
+    bot_handler.db_manager.flush_task_history()
+
+application = Application.builder().token(TOKEN).post_shutdown(flush_history).build()
+
+maintenance = DatabaseMaintenance(bot_handler.db_manager.db_path) # Обслуживание БД
+scheduler = Scheduler(application.bot, bot_handler.db_manager, maintenance) # Планировщик
 
 async def run_scheduler():
     """Фоновый запуск планировщика"""
@@ -32,6 +39,7 @@ def main():
 
     # Обработчики команд
     application.add_handler(CommandHandler("start", bot_handler.main_menu))
+    application.add_handler(CommandHandler("stats", bot_handler.show_stats))
     
     # Обработчики кнопок
     application.add_handler(CallbackQueryHandler(bot_handler.calendar_handler, pattern="^cbcal_.*"))
@@ -41,7 +49,7 @@ def main():
     application.add_handler(CallbackQueryHandler(bot_handler.confirm_task_completion, pattern="^(confirm_complete|cancel)$"))
     application.add_handler(CallbackQueryHandler(bot_handler.edit_task, pattern="^(edit_name|edit_date|edit_time|edit_recurrence)$"))
     application.add_handler(CallbackQueryHandler(bot_handler.handle_recurrence_change, pattern=r"^recurrence_"))
-    application.add_handler(CallbackQueryHandler(bot_handler.button_handler, pattern="^(list_today|list|add|main_menu)$"))
+    application.add_handler(CallbackQueryHandler(bot_handler.button_handler, pattern="^(list_today|list|add|stats|main_menu)$"))
 
     # Обработчик текстового ввода
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, bot_handler.handle_text_input))
@@ -0,0 +1,166 @@
+import bisect
+import datetime
+from task import Task
+from storage_backend import StorageBackend
+
+
+class InMemoryStorage(StorageBackend):
+    def __init__(self, history_batch_size=20):
+        """
+        Хранилище задач в памяти процесса (для тестов и бенчмарков без дискового I/O).
+        Задачи индексируются по ID, по пользователю и по сроку (отсортированный список).
+        """
+        super().__init__(history_batch_size)
+        self._tasks = {}
+        self._user_tasks = {}
+        self._due_index = []
+        self._recurring = set()
+        self._next_id = 1
+        self._history = []
+        self._stats = {}
+
+    @staticmethod
+    def _task_id(task_id):
+        """Приводит ID к int, как это делает SQLite; нечисловой ID не найдёт ни одной задачи"""
+        try:
+            return int(task_id)
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _text(value):
+        """Сохраняет дату так же, как адаптер sqlite3: datetime.date -> 'YYYY-MM-DD'"""
+        if isinstance(value, datetime.date):
+            return value.strftime("%Y-%m-%d")
+        return value
+
+    def _index(self, row):
+        task_id, _, _, date, time, recurrence = row
+        bisect.insort(self._due_index, (date, time, task_id))
+        if recurrence != "once":
+            self._recurring.add(task_id)
+
+    def _unindex(self, row):
+        task_id, _, _, date, time, _ = row
+        position = bisect.bisect_left(self._due_index, (date, time, task_id))
+        del self._due_index[position]
+        self._recurring.discard(task_id)
+
+    def _replace(self, task_id, **fields):
+        row = self._tasks[task_id]
+        self._unindex(row)
+        _, user_id, name, date, time, recurrence = row
+        row = (
+            task_id,
+            user_id,
+            fields.get("name", name),
+            self._text(fields.get("date", date)),
+            self._text(fields.get("time", time)),
+            fields.get("recurrence", recurrence),
+        )
+        self._tasks[task_id] = row
+        self._index(row)
+
+    def get_task_by_id(self, task_id):
+        """Получает задачу по ID"""
+        return self._tasks.get(self._task_id(task_id))
+
+    async def add_task(self, user_id, name, date, time, recurrence):
+        """Асинхронно добавляет новую задачу"""
+        row = (self._next_id, user_id, name, self._text(date), self._text(time), recurrence)
+        self._next_id += 1
+        self._tasks[row[0]] = row
+        self._user_tasks.setdefault(user_id, {})[row[0]] = None
+        self._index(row)
+
+    def get_tasks(self, user_id, max_date=None):
+        """Получает все задачи пользователя.
+        Если передана max_date, то возвращает только задачи с этой датой или раньше.
+        """
+        rows = [self._tasks[task_id] for task_id in self._user_tasks.get(user_id, ())]
+        if max_date:
+            max_date = self._text(max_date)
+            rows = [row for row in rows if row[3] <= max_date]
+        return rows
+
+    def get_tasks_by_date(self, user_id, date):
+        """Получает задачи пользователя на определённую дату"""
+        return [
+            (task_id, name, time, recurrence)
+            for task_id, _, name, task_date, time, recurrence in self.get_tasks(user_id)
+            if task_date == self._text(date)
+        ]
+
+    def update_task(self, task):
+        """Обновляет задачу"""
+        task_id = self._task_id(task.task_id)
+        if task_id in self._tasks:
+            self._replace(task_id, name=task.name, date=task.date, time=task.time, recurrence=task.recurrence)
+
+    def get_all_tasks(self):
+        """Получает все задачи"""
+        return list(self._tasks.values())
+
+    async def update_task_field(self, task_id, field, value):
+        """Асинхронно обновляет одно поле задачи"""
+        allowed_fields = ["name", "date", "time", "recurrence"]
+        if field not in allowed_fields:
+            raise ValueError(f"Недопустимое поле: {field}")
+        task_id = self._task_id(task_id)
+        if task_id in self._tasks:
+            self._replace(task_id, **{field: value})
+
+    def delete_task(self, task_id):
+        """Удаляет задачу"""
+        row = self._tasks.pop(self._task_id(task_id), None)
+        if row:
+            self._unindex(row)
+            user_tasks = self._user_tasks[row[1]]
+            del user_tasks[row[0]]
+            if not user_tasks:
+                del self._user_tasks[row[1]]
+
+    async def get_tasks_for_today(self):
+        """Получает задачи на сегодня и просроченные, а также все повторяющиеся"""
+        today = datetime.datetime.now().strftime("%Y-%m-%d")
+        end = bisect.bisect_right(self._due_index, (today, "\uffff"))
+        task_ids = {task_id for _, _, task_id in self._due_index[:end]} | self._recurring
+        return [Task(*self._tasks[task_id]) for task_id in sorted(task_ids)]
+
+    async def get_all_tasks_with_prefix(self, prefix="❌"):
+        """Получает все задачи, у которых в начале имени есть указанный префикс"""
+        return [Task(*row) for row in self._tasks.values() if row[2].startswith(prefix)]
+
+    async def get_all_users(self):
+        """Получает список уникальных user_id"""
+        return list(self._user_tasks)
+
+    def flush_task_history(self):
+        """Переносит буфер событий в журнал и обновляет счётчики"""
+        events, self._history_buffer = self._history_buffer, []
+        for event in events:
+            self._history.append(event)
+            row = self._stats.setdefault(event[0], {}).setdefault(event[3], [0, 0, 0, 0, 0, 0])
+            self._apply_event(row, event[6], len(self._history))
+
+    def complete_task(self, task, outcome, event_at=None):
+        """Удаляет задачу и записывает событие о её выполнении"""
+        self._history_buffer.append(self._history_event(task, outcome, event_at))
+        self.flush_task_history()
+        self.delete_task(task.task_id)
+
+    def get_user_stats(self, user_id):
+        """Получает готовые счётчики пользователя по каждому типу периодичности"""
+        self.flush_task_history()
+        return [(recurrence, *row[:5]) for recurrence, row in self._stats.get(user_id, {}).items()]
+
+    def rebuild_user_stats(self):
+        """Пересчитывает счётчики по журналу; True, если они совпали с накопленными"""
+        self.flush_task_history()
+        stats = {}
+        for event_id, event in enumerate(self._history, start=1):
+            row = stats.setdefault(event[0], {}).setdefault(event[3], [0, 0, 0, 0, 0, 0])
+            self._apply_event(row, event[6], event_id)
+        matched = stats == self._stats
+        self._stats = stats
+        return matched
@@ -0,0 +1,153 @@
+import functools
+import logging
+from telegram import Update
+
+logger = logging.getLogger(__name__)
+
+
+class ApiCallCounter:
+    def __init__(self):
+        """
+        Счётчики вызовов Bot API по взаимодействиям.
+        requested — сколько вызовов запросили обработчики (до объединения),
+        sent — сколько вызовов реально отправлено (после объединения).
+        Отчёт пишется в лог на уровне INFO каждые report_every взаимодействий.
+        """
+        self.interactions = 0
+        self.requested = 0
+        self.sent = 0
+        self.report_every = 100
+
+    def per_interaction(self):
+        """Возвращает среднее число вызовов на взаимодействие: (до, после)"""
+        if not self.interactions:
+            return 0.0, 0.0
+        return self.requested / self.interactions, self.sent / self.interactions
+
+    def report(self):
+        before, after = self.per_interaction()
+        return f"Вызовы Bot API на взаимодействие: {before:.2f} -> {after:.2f} (взаимодействий: {self.interactions})"
+
+
+api_call_counter = ApiCallCounter()
+
+
+class ResponseComposer:
+    def __init__(self, update: Update):
+        """
+        Собирает исходящие сообщения обработчика и отправляет их минимальным числом вызовов.
+        :param update: Обрабатываемое обновление
+        """
+        self.query = update.callback_query
+        self.message = self.query.message if self.query else update.message
+        self.discard()
+
+    def discard(self):
+        """Отбрасывает ещё не отправленные сообщения"""
+        self.answered = False
+        self.deleted = False
+        self.messages = []
+        self.requested = 0
+
+    def answer(self):
+        """Ответ на callback-запрос (отправляется не более одного раза)"""
+        self.requested += 1
+        self.answered = True
+
+    def delete(self):
+        """Удаление сообщения, к которому привязан callback-запрос"""
+        self.requested += 1
+        self.deleted = True
+
+    def edit(self, text, reply_markup=None, parse_mode=None):
+        """Редактирование сообщения, к которому привязан callback-запрос"""
+        self.requested += 1
+        self.messages.append({"edit": True, "text": text, "reply_markup": reply_markup, "parse_mode": parse_mode})
+
+    def reply(self, text, reply_markup=None, parse_mode=None):
+        """Новое сообщение в чат"""
+        self.requested += 1
+        self.messages.append({"edit": False, "text": text, "reply_markup": reply_markup, "parse_mode": parse_mode})
+
+    def compose(self):
+        """Объединяет сообщения: текст без клавиатуры склеивается со следующим сообщением,
+        повторное редактирование заменяет предыдущее, удаление + новое сообщение становятся редактированием.
+        """
+        composed = []
+        for message in self.messages:
+            message = dict(message, edit=message["edit"] and self.query is not None)
+            last = composed[-1] if composed else None
+            if last and last["parse_mode"] == message["parse_mode"]:
+                if last["reply_markup"] is None:
+                    message["text"] = f"{last['text']}\n\n{message['text']}"
+                    message["edit"] = last["edit"] or message["edit"]
+                    composed[-1] = message
+                    continue
+                if last["edit"] and message["edit"]:
+                    composed[-1] = message
+                    continue
+            composed.append(message)
+
+        if self.deleted and composed and self.query and not composed[0]["edit"]:
+            composed[0]["edit"] = True
+            self.deleted = False
+        return composed
+
+    async def flush(self):
+        """Отправляет собранный ответ и обновляет счётчики; после отправки очередь пуста"""
+        sent = 0
+        requested = self.requested
+        messages = self.compose()
+        answered, deleted = self.answered, self.deleted
+        self.discard()
+        if answered and self.query:
+            await self.query.answer()
+            sent += 1
+        if deleted:
+            await self.message.delete()
+            sent += 1
+        for message in messages:
+            send = self.message.edit_text if message["edit"] else self.message.reply_text
+            await send(message["text"], reply_markup=message["reply_markup"], parse_mode=message["parse_mode"])
+            sent += 1
+
+        api_call_counter.requested += requested
+        api_call_counter.sent += sent
+        logger.debug(f"Вызовов Bot API: {requested} -> {sent}")
+
+
+def composed_handler(handler=None, *, fallback_text=None):
+    """Декоратор обработчика BotHandler: кладёт ResponseComposer в context.response
+    (или переиспользует уже созданный внешним обработчиком) и отправляет ответ,
+    если внешний вызов завершился без исключения.
+    :param fallback_text: Если задан, ошибка обработчика или отправки логируется,
+        а пользователю вместо собранного ответа отправляется этот текст
+    """
+    if handler is None:
+        return functools.partial(composed_handler, fallback_text=fallback_text)
+
+    @functools.wraps(handler)
+    async def wrapper(self, update: Update, context, *args, **kwargs):
+        if getattr(context, "response", None):
+            return await handler(self, update, context, *args, **kwargs)
+
+        response = context.response = ResponseComposer(update)
+        try:
+            result = await handler(self, update, context, *args, **kwargs)
+            await response.flush()
+        except Exception as e:
+            if fallback_text is None:
+                raise
+            logger.error(f"Ошибка в {handler.__name__}: {e}")
+            result = None
+            response.discard()
+            response.reply(fallback_text)
+            await response.flush()
+        finally:
+            context.response = None
+
+        api_call_counter.interactions += 1
+        if api_call_counter.interactions % api_call_counter.report_every == 0:
+            logger.info(api_call_counter.report())
+        return result
+    return wrapper
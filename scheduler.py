@@ -1,15 +1,20 @@
 import asyncio
 import datetime
 import logging
-from database_manager import DatabaseManager
+import sqlite3
+from storage_backend import StorageBackend
+from db_maintenance import DatabaseMaintenance
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 class Scheduler:
-    def __init__(self, bot, db_manager: DatabaseManager):
+    def __init__(self, bot, db_manager: StorageBackend, maintenance: DatabaseMaintenance = None, maintenance_hours=range(2, 6)):
         self.bot = bot
         self.db_manager = db_manager
+        self.maintenance = maintenance
+        self.maintenance_hours = maintenance_hours
+        self.maintenance_task = None
         self.notified_tasks_30min = set()  
         self.notified_missed_tasks = set()  
         self.has_active_tasks = False
@@ -20,6 +25,8 @@ class Scheduler:
         logger.info("Запуск планировщика...")
         while True:
             await self.check_tasks()
+            if self.maintenance and not self.maintenance_task:
+                self.maintenance_task = asyncio.create_task(self.maintenance_loop())
             sleep_time = 60 if self.has_active_tasks else 600  
             await asyncio.sleep(sleep_time)
 
@@ -59,6 +66,11 @@ class Scheduler:
                 await self.db_manager.update_task_field(task.task_id, "name", new_name)
                 logger.info(f"✅ Убрали ❌ у задачи: {new_name} (Обновлённая дата)")
 
+        try:
+            self.db_manager.flush_task_history()
+        except sqlite3.Error as e:
+            logger.warning(f"История задач не записана, повтор на следующей проверке: {e}")
+
         if now.hour == 0 and now.minute in {0, 1} and not self.midnight_notified:
             await self.send_midnight_notifications(users_with_tasks)
             self.midnight_notified = True
@@ -66,6 +78,23 @@ class Scheduler:
         if now.hour == 1:
             self.midnight_notified = False
 
+    async def maintenance_loop(self, interval=60):
+        """Отдельная задача обслуживания БД, чтобы долгие работы не задерживали check_tasks"""
+        while True:
+            await self.run_maintenance()
+            await asyncio.sleep(interval)
+
+    async def run_maintenance(self):
+        """Запускает порцию обслуживания БД в периоды низкой нагрузки"""
+        if not self.maintenance:
+            return
+        if self.has_active_tasks and datetime.datetime.now().hour not in self.maintenance_hours:
+            return
+        try:
+            await self.maintenance.run()
+        except Exception as e:
+            logger.error(f"Ошибка обслуживания БД: {e}")
+
     async def send_midnight_notifications(self, users_with_tasks):
         """Отправляет уведомления в 00:00: задачи на сегодня и пропущенные задачи"""
         all_users = await self.db_manager.get_all_users()
@@ -0,0 +1,116 @@
+import datetime
+from abc import ABC, abstractmethod
+
+# on_time/late — задача выполнена до/после срока,
+# missed — срок прошёл и задача перенесена на другое время без выполнения.
+HISTORY_OUTCOMES = ("on_time", "late", "missed")
+
+
+class StorageBackend(ABC):
+    """Интерфейс хранилища задач, которым пользуются TaskManager, Scheduler и BotHandler.
+    Строки задач возвращаются кортежами (id, user_id, name, date, time, recurrence),
+    асинхронные методы совпадают с асинхронными методами DatabaseManager.
+    """
+
+    def __init__(self, history_batch_size=20):
+        self.history_batch_size = history_batch_size
+        self._history_buffer = []
+
+    @abstractmethod
+    def get_task_by_id(self, task_id):
+        """Получает задачу по ID"""
+
+    @abstractmethod
+    async def add_task(self, user_id, name, date, time, recurrence):
+        """Асинхронно добавляет новую задачу"""
+
+    @abstractmethod
+    def get_tasks(self, user_id, max_date=None):
+        """Получает задачи пользователя (с датой не позже max_date, если она передана)"""
+
+    @abstractmethod
+    def get_tasks_by_date(self, user_id, date):
+        """Получает задачи пользователя на определённую дату: (id, name, time, recurrence)"""
+
+    @abstractmethod
+    def update_task(self, task):
+        """Обновляет задачу"""
+
+    @abstractmethod
+    def get_all_tasks(self):
+        """Получает все задачи"""
+
+    @abstractmethod
+    async def update_task_field(self, task_id, field, value):
+        """Асинхронно обновляет одно поле задачи"""
+
+    @abstractmethod
+    def delete_task(self, task_id):
+        """Удаляет задачу"""
+
+    @abstractmethod
+    async def get_tasks_for_today(self):
+        """Получает задачи на сегодня, просроченные и повторяющиеся (список Task)"""
+
+    @abstractmethod
+    async def get_all_tasks_with_prefix(self, prefix="❌"):
+        """Получает задачи, имя которых начинается с prefix (список Task)"""
+
+    @abstractmethod
+    async def get_all_users(self):
+        """Получает список уникальных user_id"""
+
+    @abstractmethod
+    def flush_task_history(self):
+        """Записывает накопленные события истории и обновляет статистику"""
+
+    @abstractmethod
+    def complete_task(self, task, outcome, event_at=None):
+        """Удаляет выполненную задачу и записывает событие в историю атомарно"""
+
+    @abstractmethod
+    def get_user_stats(self, user_id):
+        """Получает счётчики пользователя: (recurrence, on_time, late, missed, current_streak, best_streak)"""
+
+    @abstractmethod
+    def rebuild_user_stats(self):
+        """Пересчитывает статистику по журналу; True, если она совпала с накопленной"""
+
+    def record_task_event(self, task, outcome, event_at=None):
+        """Добавляет событие по задаче в буфер истории (on_time, late, missed).
+        Буфер сбрасывается пачкой при достижении history_batch_size.
+        """
+        self._history_buffer.append(self._history_event(task, outcome, event_at))
+        if len(self._history_buffer) >= self.history_batch_size:
+            self.flush_task_history()
+
+    @staticmethod
+    def _history_event(task, outcome, event_at=None):
+        """Формирует строку task_history: (user_id, task_id, name, recurrence, due_at, event_at, outcome)"""
+        if outcome not in HISTORY_OUTCOMES:
+            raise ValueError(f"Недопустимый результат: {outcome}")
+        event_at = event_at or datetime.datetime.now()
+        return (
+            task.user_id,
+            task.task_id,
+            task.name.lstrip("❌ ").strip(),
+            task.recurrence or "once",
+            f"{task.date} {task.time}",
+            event_at.strftime("%Y-%m-%d %H:%M:%S"),
+            outcome,
+        )
+
+    @staticmethod
+    def _apply_event(row, outcome, event_id):
+        """Применяет одно событие к счётчикам [on_time, late, missed, current_streak, best_streak, last_event_id]"""
+        if outcome == "on_time":
+            row[0] += 1
+            row[3] += 1
+            row[4] = max(row[4], row[3])
+        elif outcome == "late":
+            row[1] += 1
+            row[3] = 0
+        else:
+            row[2] += 1
+            row[3] = 0
+        row[5] = event_id
@@ -1,13 +1,13 @@
-from database_manager import DatabaseManager
+from storage_backend import StorageBackend
 from task import Task
-from datetime import date
+from datetime import date, datetime
 
 class TaskManager:
-    def __init__(self, user_id: int, db_manager: DatabaseManager):
+    def __init__(self, user_id: int, db_manager: StorageBackend):
         """
         Менеджер задач для конкретного пользователя.
         :param user_id: ID пользователя
-        :param db_manager: Экземпляр DatabaseManager
+        :param db_manager: Хранилище задач (DatabaseManager, InMemoryStorage)
         """
         self.user_id = user_id
         self.db_manager = db_manager
@@ -27,6 +27,29 @@ class TaskManager:
         """ Удаляет задачу из БД """
         self.db_manager.delete_task(task_id)
 
+    def complete_task(self, task: Task):
+        """ Записывает выполнение задачи в историю и удаляет её из БД """
+        now = datetime.now()
+        outcome = "on_time" if now <= self._due(task) else "late"
+        self.db_manager.complete_task(task, outcome, now)
+
+    def reschedule_task(self, task: Task, new_date: str = None, new_time: str = None):
+        """ Переносит задачу на новую дату/время; перенос просроченной задачи записывается как пропуск """
+        now = datetime.now()
+        if self._due(task) < now:
+            self.db_manager.record_task_event(task, "missed", now)
+        task.date = new_date or task.date
+        task.time = new_time or task.time
+        self.db_manager.update_task(task)
+
+    @staticmethod
+    def _due(task: Task):
+        return datetime.strptime(f"{task.date} {task.time}", "%Y-%m-%d %H:%M")
+
+    def get_stats(self):
+        """ Возвращает накопленную статистику пользователя по типам периодичности """
+        return self.db_manager.get_user_stats(self.user_id)
+
     def get_all_tasks(self):
         """ Возвращает все задачи пользователя """
         tasks_data = self.db_manager.get_tasks(self.user_id)
@@ -0,0 +1,100 @@
+import asyncio
+import sqlite3
+import time
+
+from database_manager import DatabaseManager
+from db_maintenance import DatabaseMaintenance
+from scheduler import Scheduler
+
+
+def fill(db, count=500):
+    async def add():
+        for _ in range(count):
+            await db.add_task(1, "x" * 200, "2999-01-01", "10:00", "once")
+    asyncio.run(add())
+    db.execute_query("DELETE FROM tasks WHERE id > ?", (count // 2,))
+
+
+def legacy_database(path):
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE tasks (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL, name TEXT NOT NULL, date TEXT NOT NULL, time TEXT NOT NULL, recurrence TEXT NOT NULL)")
+    return DatabaseManager(path)
+
+
+def test_slice_reports_and_backs_up(tmp_path):
+    db = DatabaseManager(str(tmp_path / "t.db"))
+    fill(db)
+    maintenance = DatabaseMaintenance(db.db_path, backup_dir=str(tmp_path / "backups"))
+
+    report = maintenance.run_slice(budget=5)
+
+    assert {"page_count", "freelist_count", "fragmentation", "backup_duration"} <= set(report)
+    with sqlite3.connect(report["backup_path"]) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0] == 250
+    assert maintenance.run_slice() == {}
+
+
+def test_new_database_frees_pages(tmp_path):
+    db = DatabaseManager(str(tmp_path / "t.db"))
+    fill(db)
+    maintenance = DatabaseMaintenance(db.db_path, backup_dir=str(tmp_path / "backups"))
+    maintenance.checkpoint()
+    assert maintenance.page_stats()["freelist_count"] > 0
+
+    maintenance.incremental_vacuum(time.monotonic() + 5)
+    assert maintenance.page_stats()["freelist_count"] == 0
+
+
+def test_legacy_database_is_not_vacuumed_in_background(tmp_path):
+    db = legacy_database(str(tmp_path / "t.db"))
+    fill(db)
+    maintenance = DatabaseMaintenance(db.db_path, backup_dir=str(tmp_path / "backups"))
+    maintenance.checkpoint()
+
+    started = time.monotonic()
+    assert maintenance.incremental_vacuum(started + 5) == {"freed_pages": 0}
+    assert time.monotonic() - started < 1
+    maintenance.run_slice(budget=5)
+    assert not maintenance.incremental_vacuum_enabled()
+    assert maintenance.page_stats()["freelist_count"] > 0
+
+    assert maintenance.enable_incremental_vacuum()
+    assert maintenance.incremental_vacuum_enabled()
+
+
+def test_slow_maintenance_does_not_delay_checks(tmp_path, monkeypatch):
+    db = DatabaseManager(str(tmp_path / "t.db"))
+    maintenance = DatabaseMaintenance(db.db_path, backup_dir=str(tmp_path / "backups"))
+    maintenance.run_slice = lambda budget=0.5: time.sleep(0.5)
+    scheduler = Scheduler(None, db, maintenance)
+    checks = []
+
+    async def check_tasks():
+        checks.append(time.monotonic())
+        scheduler.has_active_tasks = len(checks) < 2
+
+    original_sleep = asyncio.sleep
+    monkeypatch.setattr(asyncio, "sleep", lambda seconds: original_sleep(min(seconds, 0.05)))
+    scheduler.check_tasks = check_tasks
+
+    async def run():
+        try:
+            await asyncio.wait_for(scheduler.start(), timeout=0.3)
+        except asyncio.TimeoutError:
+            scheduler.maintenance_task.cancel()
+
+    asyncio.run(run())
+    assert len(checks) >= 3
+
+
+def test_slice_with_only_optimize_is_reported(tmp_path):
+    db = DatabaseManager(str(tmp_path / "t.db"))
+    maintenance = DatabaseMaintenance(db.db_path, backup_dir=str(tmp_path / "backups"))
+    maintenance.run_slice(budget=5)
+    del maintenance.last_run["optimize"]
+
+    report = maintenance.run_slice(budget=5)
+
+    assert report["jobs"] == ["optimize"]
+    assert {"page_count", "freelist_count", "fragmentation"} <= set(report)
+    assert maintenance.last_report == report
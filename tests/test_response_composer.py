@@ -0,0 +1,170 @@
+import asyncio
+import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from bot_handler import BotHandler
+from memory_storage import InMemoryStorage
+from response_composer import api_call_counter
+from task import Task
+
+TOMORROW = (datetime.date.today() + datetime.timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+class FakeMessage:
+    def __init__(self, calls, text=None, fail=False):
+        self.calls = calls
+        self.text = text
+        self.chat_id = 1
+        self.fail = fail
+
+    async def edit_text(self, text, **kwargs):
+        self.calls.append(("edit_text", text, kwargs.get("reply_markup") is not None))
+
+    async def reply_text(self, text, **kwargs):
+        if self.fail:
+            self.fail = False
+            raise RuntimeError("send failed")
+        self.calls.append(("reply_text", text, kwargs.get("reply_markup") is not None))
+
+    async def delete(self):
+        self.calls.append(("delete",))
+
+
+class FakeQuery:
+    def __init__(self, calls, data):
+        self.data = data
+        self.message = FakeMessage(calls)
+        self.calls = calls
+
+    async def answer(self):
+        self.calls.append(("answer",))
+
+
+def callback_update(data, update_id=1):
+    calls = []
+    update = SimpleNamespace(
+        update_id=update_id,
+        callback_query=FakeQuery(calls, data),
+        message=None,
+        effective_chat=SimpleNamespace(id=1),
+    )
+    return update, calls
+
+
+def text_update(text, fail=False):
+    calls = []
+    update = SimpleNamespace(
+        update_id=1,
+        callback_query=None,
+        message=FakeMessage(calls, text, fail),
+        effective_chat=SimpleNamespace(id=1),
+    )
+    return update, calls
+
+
+@pytest.fixture
+def handler():
+    storage = InMemoryStorage()
+    asyncio.run(storage.add_task(1, "a", TOMORROW, "10:00", "once"))
+    return BotHandler(storage)
+
+
+def context(**user_data):
+    return SimpleNamespace(user_data=user_data)
+
+
+def run(coro):
+    before = (api_call_counter.interactions, api_call_counter.requested, api_call_counter.sent)
+    asyncio.run(coro)
+    return (
+        api_call_counter.interactions - before[0],
+        api_call_counter.requested - before[1],
+        api_call_counter.sent - before[2],
+    )
+
+
+def test_confirm_task_completion(handler):
+    update, calls = callback_update("confirm_complete")
+    task = Task(*handler.db_manager.get_task_by_id(1))
+
+    assert run(handler.confirm_task_completion(update, context(selected_task=task))) == (1, 4, 2)
+    assert calls == [("answer",), ("edit_text", "✅ Задача 'a' завершена.\n\nВыберите действие: ⚙️", True)]
+    assert handler.db_manager.get_all_tasks() == []
+
+
+def test_save_task(handler):
+    update, calls = callback_update("daily")
+    ctx = context(task_name="b", task_date=TOMORROW, task_time="09:00")
+
+    assert run(handler.period_choice_handler(update, ctx)) == (1, 3, 2)
+    assert calls == [("answer",), ("edit_text", "✅ Задача успешно сохранена!\n\nВыберите действие: ⚙️", True)]
+
+
+def test_handle_recurrence_change(handler):
+    update, calls = callback_update("recurrence_weekly")
+    task = Task(*handler.db_manager.get_task_by_id(1))
+
+    assert run(handler.handle_recurrence_change(update, context(selected_task=task))) == (1, 3, 2)
+    assert calls[0] == ("answer",)
+    assert calls[1][0] == "edit_text" and calls[1][2]
+    assert handler.db_manager.get_task_by_id(1)[5] == "weekly"
+
+
+def test_ask_for_date(handler):
+    update, calls = callback_update("edit_date")
+    task = Task(*handler.db_manager.get_task_by_id(1))
+
+    assert run(handler.edit_task(update, context(selected_task=task))) == (1, 3, 2)
+    assert [call[0] for call in calls] == ["answer", "edit_text"]
+
+
+def test_show_tasks_without_tasks(handler):
+    handler.db_manager.delete_task(1)
+    update, calls = callback_update("list")
+
+    assert run(handler.button_handler(update, context())) == (1, 4, 2)
+    assert calls == [("answer",), ("edit_text", "📭 Нет активных задач.\n\nВыберите действие: ⚙️", True)]
+
+
+def test_text_input_merges_replies(handler):
+    update, calls = text_update("b")
+
+    assert run(handler.handle_text_input(update, context(adding_task=True))) == (1, 2, 1)
+    assert [call[0] for call in calls] == ["reply_text"]
+
+
+def test_text_input_send_error_shows_fallback(handler):
+    update, calls = text_update("b", fail=True)
+
+    run(handler.handle_text_input(update, context(adding_task=True)))
+    assert calls == [("reply_text", "⚠️ Произошла ошибка при обработке ввода. Попробуйте еще раз.", False)]
+
+
+def test_handler_error_sends_nothing(handler):
+    update, calls = callback_update("confirm_complete")
+    broken_task = Task(1, 1, "a", "not-a-date", "10:00", "once")
+    ctx = context(selected_task=broken_task)
+
+    with pytest.raises(ValueError):
+        asyncio.run(handler.confirm_task_completion(update, ctx))
+    assert calls == []
+    assert ctx.response is None
+
+
+def test_text_input_handler_error_shows_fallback(handler):
+    update, calls = text_update("10:00")
+    broken_task = Task(1, 1, "a", "not-a-date", "10:00", "once")
+
+    assert run(handler.handle_text_input(update, context(editing_task=True, edit_type="time", selected_task=broken_task))) == (1, 1, 1)
+    assert calls == [("reply_text", "⚠️ Произошла ошибка при обработке ввода. Попробуйте еще раз.", False)]
+
+
+def test_counters_are_reported_periodically(handler, monkeypatch, caplog):
+    monkeypatch.setattr(api_call_counter, "report_every", 1)
+    update, _ = callback_update("list")
+
+    with caplog.at_level("INFO", logger="response_composer"):
+        asyncio.run(handler.button_handler(update, context()))
+    assert "Вызовы Bot API на взаимодействие" in caplog.text
@@ -0,0 +1,183 @@
+import asyncio
+import datetime
+
+import pytest
+
+from database_manager import DatabaseManager
+from memory_storage import InMemoryStorage
+from task import Task
+
+TODAY = datetime.date.today().strftime("%Y-%m-%d")
+PAST = "2000-01-01"
+FUTURE = "2999-01-01"
+
+
+@pytest.fixture(params=["sqlite", "memory"])
+def storage(request, tmp_path):
+    if request.param == "sqlite":
+        return DatabaseManager(str(tmp_path / "t.db"))
+    return InMemoryStorage()
+
+
+def add(storage, user_id, name, date, time="10:00", recurrence="once"):
+    asyncio.run(storage.add_task(user_id, name, date, time, recurrence))
+    return max(row[0] for row in storage.get_all_tasks())
+
+
+def test_add_and_get_task_by_id(storage):
+    task_id = add(storage, 1, "a", TODAY)
+
+    assert storage.get_task_by_id(task_id) == (task_id, 1, "a", TODAY, "10:00", "once")
+    assert storage.get_task_by_id(str(task_id)) == (task_id, 1, "a", TODAY, "10:00", "once")
+    assert storage.get_task_by_id(task_id + 100) is None
+    assert storage.get_task_by_id("abc") is None
+
+
+def test_get_tasks_with_max_date(storage):
+    past = add(storage, 1, "past", PAST)
+    today = add(storage, 1, "today", TODAY)
+    future = add(storage, 1, "future", FUTURE)
+    add(storage, 2, "other", PAST)
+
+    assert [row[0] for row in storage.get_tasks(1)] == [past, today, future]
+    assert [row[0] for row in storage.get_tasks(1, max_date=TODAY)] == [past, today]
+    assert storage.get_tasks(3) == []
+
+
+def test_get_tasks_by_date(storage):
+    task_id = add(storage, 1, "a", TODAY, "09:00", "daily")
+    add(storage, 1, "b", FUTURE)
+    add(storage, 2, "c", TODAY)
+
+    assert storage.get_tasks_by_date(1, TODAY) == [(task_id, "a", "09:00", "daily")]
+
+
+def test_update_task(storage):
+    task_id = add(storage, 1, "a", PAST)
+    storage.update_task(Task(task_id, 1, "b", FUTURE, "11:00", "weekly"))
+
+    assert storage.get_task_by_id(task_id) == (task_id, 1, "b", FUTURE, "11:00", "weekly")
+    assert storage.get_tasks(1, max_date=TODAY) == []
+
+
+def test_update_keeps_task_order(storage):
+    first = add(storage, 1, "a", PAST)
+    second = add(storage, 1, "b", TODAY)
+    third = add(storage, 1, "c", FUTURE)
+    storage.update_task(Task(first, 1, "a2", FUTURE, "12:00", "daily"))
+    asyncio.run(storage.update_task_field(second, "date", FUTURE))
+
+    assert [row[0] for row in storage.get_tasks(1)] == [first, second, third]
+
+
+def test_dates_are_stored_as_text(storage):
+    date = datetime.date(2999, 1, 5)
+    task_id = add(storage, 1, "a", date)
+    other = add(storage, 1, "b", TODAY)
+    storage.update_task(Task(other, 1, "b", date, "10:00", "once"))
+    asyncio.run(storage.update_task_field(task_id, "date", datetime.date(2000, 1, 1)))
+
+    assert storage.get_task_by_id(task_id)[3] == "2000-01-01"
+    assert storage.get_task_by_id(other)[3] == "2999-01-05"
+    assert storage.get_tasks_by_date(1, date) == [(other, "b", "10:00", "once")]
+    assert [row[0] for row in storage.get_tasks(1, max_date=datetime.date.today())] == [task_id]
+    assert [task.task_id for task in asyncio.run(storage.get_tasks_for_today())] == [task_id]
+
+
+@pytest.mark.parametrize("as_str", [False, True])
+def test_update_task_field(storage, as_str):
+    task_id = add(storage, 1, "a", PAST)
+    asyncio.run(storage.update_task_field(str(task_id) if as_str else task_id, "date", FUTURE))
+
+    assert storage.get_task_by_id(task_id)[3] == FUTURE
+    assert storage.get_tasks(1, max_date=TODAY) == []
+
+
+def test_update_task_field_rejects_unknown_field(storage):
+    task_id = add(storage, 1, "a", PAST)
+    with pytest.raises(ValueError):
+        asyncio.run(storage.update_task_field(task_id, "user_id", 2))
+
+
+def test_delete_task(storage):
+    task_id = add(storage, 1, "a", PAST)
+    other = add(storage, 2, "b", PAST)
+    storage.delete_task(task_id)
+    storage.delete_task("abc")
+
+    assert storage.get_task_by_id(task_id) is None
+    assert [row[0] for row in storage.get_all_tasks()] == [other]
+    assert asyncio.run(storage.get_all_users()) == [2]
+
+
+def test_get_tasks_for_today(storage):
+    overdue = add(storage, 1, "overdue", PAST)
+    today = add(storage, 1, "today", TODAY, "23:59")
+    recurring = add(storage, 2, "recurring", FUTURE, recurrence="monthly")
+    add(storage, 2, "future", FUTURE)
+
+    tasks = asyncio.run(storage.get_tasks_for_today())
+    assert sorted(task.task_id for task in tasks) == [overdue, today, recurring]
+    assert all(isinstance(task, Task) for task in tasks)
+
+
+def test_get_all_tasks_with_prefix(storage):
+    marked = add(storage, 1, "❌ a", PAST)
+    add(storage, 1, "a ❌", PAST)
+    percent = add(storage, 1, "%x", PAST)
+    add(storage, 1, "Abc", PAST)
+    underscore = add(storage, 1, "_y", PAST)
+
+    assert [task.task_id for task in asyncio.run(storage.get_all_tasks_with_prefix())] == [marked]
+    assert [task.task_id for task in asyncio.run(storage.get_all_tasks_with_prefix("%"))] == [percent]
+    assert [task.task_id for task in asyncio.run(storage.get_all_tasks_with_prefix("_"))] == [underscore]
+    assert asyncio.run(storage.get_all_tasks_with_prefix("abc")) == []
+
+
+def test_get_all_users(storage):
+    add(storage, 2, "a", PAST)
+    add(storage, 1, "b", PAST)
+    add(storage, 2, "c", PAST)
+
+    assert sorted(asyncio.run(storage.get_all_users())) == [1, 2]
+
+
+def test_history_batches_and_stats(storage):
+    storage.history_batch_size = 3
+    task = Task(1, 1, "❌ a", PAST, "10:00", "daily")
+    for outcome in ["on_time", "on_time"]:
+        storage.record_task_event(task, outcome)
+    assert len(storage._history_buffer) == 2
+
+    storage.record_task_event(task, "late")
+    assert storage._history_buffer == []
+
+    storage.record_task_event(task, "on_time")
+    storage.record_task_event(Task(2, 1, "b", PAST, "10:00", "once"), "missed")
+    assert sorted(storage.get_user_stats(1)) == [("daily", 3, 1, 0, 1, 2), ("once", 0, 0, 1, 0, 0)]
+    assert storage.get_user_stats(2) == []
+
+
+def test_record_task_event_rejects_unknown_outcome(storage):
+    with pytest.raises(ValueError):
+        storage.record_task_event(Task(1, 1, "a", PAST, "10:00", "once"), "skipped")
+
+
+def test_complete_task(storage):
+    task_id = add(storage, 1, "a", FUTURE)
+    storage.record_task_event(Task(99, 1, "b", PAST, "10:00", "once"), "missed")
+    storage.complete_task(Task(*storage.get_task_by_id(task_id)), "on_time")
+
+    assert storage.get_task_by_id(task_id) is None
+    assert storage._history_buffer == []
+    assert storage.get_user_stats(1) == [("once", 1, 0, 1, 1, 1)]
+
+
+def test_rebuild_user_stats(storage):
+    task = Task(1, 1, "a", PAST, "10:00", "weekly")
+    for outcome in ["on_time", "missed", "on_time", "on_time", "late"]:
+        storage.record_task_event(task, outcome)
+    stats = storage.get_user_stats(1)
+
+    assert storage.rebuild_user_stats()
+    assert storage.get_user_stats(1) == stats == [("weekly", 3, 1, 1, 0, 2)]
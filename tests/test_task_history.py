@@ -0,0 +1,99 @@
+import asyncio
+import datetime
+import sqlite3
+
+import pytest
+
+from database_manager import DatabaseManager
+from scheduler import Scheduler
+from task_manager import TaskManager
+
+
+class FakeBot:
+    def __init__(self):
+        self.messages = []
+
+    async def send_message(self, chat_id, text):
+        self.messages.append((chat_id, text))
+
+
+def add_task(db, due, recurrence="once"):
+    asyncio.run(db.add_task(1, "task", due.strftime("%Y-%m-%d"), due.strftime("%H:%M"), recurrence))
+    return TaskManager(1, db).get_all_tasks()[-1]
+
+
+@pytest.fixture
+def db(tmp_path):
+    return DatabaseManager(str(tmp_path / "t.db"))
+
+
+def test_completion_is_written_with_delete(db):
+    task = add_task(db, datetime.datetime.now() + datetime.timedelta(hours=1))
+    TaskManager(1, db).complete_task(task)
+
+    assert db._history_buffer == []
+    assert db.get_task_by_id(task.task_id) is None
+    assert db.execute_query("SELECT outcome FROM task_history", fetchall=True) == [("on_time",)]
+
+
+def test_overdue_then_completed_counts_once_as_late(db):
+    task = add_task(db, datetime.datetime.now() - datetime.timedelta(hours=1))
+    asyncio.run(Scheduler(FakeBot(), db).check_tasks())
+    task = TaskManager(1, db).get_task_by_id(task.task_id)
+    assert task.name.startswith("❌")
+
+    TaskManager(1, db).complete_task(task)
+
+    assert db.get_user_stats(1) == [("once", 0, 1, 0, 0, 0)]
+    assert db.rebuild_user_stats()
+
+
+def test_rescheduling_overdue_task_counts_as_missed(db):
+    manager = TaskManager(1, db)
+    task = add_task(db, datetime.datetime.now() - datetime.timedelta(hours=1), "daily")
+    tomorrow = (datetime.date.today() + datetime.timedelta(days=1)).strftime("%Y-%m-%d")
+    manager.reschedule_task(task, new_date=tomorrow)
+    manager.complete_task(task)
+
+    assert db.get_user_stats(1) == [("daily", 1, 0, 1, 1, 1)]
+    assert db.rebuild_user_stats()
+
+
+def test_rescheduling_future_task_is_not_missed(db):
+    task = add_task(db, datetime.datetime.now() + datetime.timedelta(hours=1))
+    TaskManager(1, db).reschedule_task(task, new_time="23:59")
+
+    assert db.get_user_stats(1) == []
+
+
+def test_failed_flush_keeps_events(db, monkeypatch):
+    task = add_task(db, datetime.datetime.now() - datetime.timedelta(hours=1))
+    db.record_task_event(task, "missed")
+
+    def locked(*args, **kwargs):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(db, "_write_history", locked)
+    with pytest.raises(sqlite3.OperationalError):
+        db.flush_task_history()
+    assert len(db._history_buffer) == 1
+
+    monkeypatch.undo()
+    db.flush_task_history()
+    assert db.get_user_stats(1) == [("once", 0, 0, 1, 0, 0)]
+
+
+def test_check_tasks_survives_locked_history_flush(db, monkeypatch):
+    task = add_task(db, datetime.datetime.now() - datetime.timedelta(hours=1))
+    db.record_task_event(task, "missed")
+
+    def locked(*args, **kwargs):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(db, "_write_history", locked)
+    asyncio.run(Scheduler(FakeBot(), db).check_tasks())
+    assert len(db._history_buffer) == 1
+
+    monkeypatch.undo()
+    asyncio.run(Scheduler(FakeBot(), db).check_tasks())
+    assert db._history_buffer == []